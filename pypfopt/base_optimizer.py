@@ -17,6 +17,15 @@ from . import objective_functions
 from . import exceptions
 
 
+def _weights_sum_residual(w):
+    return w.sum() - 1
+
+
+# scipy constraint that the weights sum to one. It captures nothing, so it is built once
+# rather than as a pair of lambdas on every call.
+_WEIGHTS_SUM_TO_ONE = {"type": "eq", "fun": _weights_sum_residual, "jac": np.ones_like}
+
+
 class BaseOptimizer:
 
     """
@@ -48,6 +57,21 @@ class BaseOptimizer:
         # Outputs
         self.weights = None
 
+    def _make_output_weights(self, weights=None):
+        """
+        Utility function to make output weight dict from weight attribute (np.array). If no
+        arguments passed, use self.weights. Converting the array with ``tolist()`` avoids
+        boxing each weight as a numpy scalar.
+
+        :param weights: weights, defaults to None (i.e self.weights)
+        :type weights: np.ndarray, optional
+        :return: {ticker: weight} dictionary
+        :rtype: dict
+        """
+        if weights is None:
+            weights = self.weights
+        return dict(zip(self.tickers, weights.tolist()))
+
     def set_weights(self, weights):
         """
         Utility function to set weights.
@@ -78,7 +102,7 @@ class BaseOptimizer:
             if not isinstance(rounding, int) or rounding < 1:
                 raise ValueError("rounding must be a positive integer")
             clean_weights = np.round(clean_weights, rounding)
-        return dict(zip(self.tickers, clean_weights))
+        return self._make_output_weights(clean_weights)
 
     def save_weights_to_file(self, filename="weights.csv"):
         """
@@ -126,27 +150,42 @@ class BaseConvexOptimizer(BaseOptimizer):
     - ``save_weights_to_file()`` saves the weights to csv, json, or txt.
     """
 
-    def __init__(self, n_assets, tickers=None, weight_bounds=(0, 1)):
+    def __init__(self, n_assets, tickers=None, weight_bounds=(0, 1), solver=None):
         """
         :param weight_bounds: minimum and maximum weight of each asset OR single min/max pair
                               if all identical, defaults to (0, 1). Must be changed to (-1, 1)
                               for portfolios with shorting.
         :type weight_bounds: tuple OR tuple list, optional
+        :param solver: name of the cvxpy solver to use (e.g "OSQP", "ECOS"), defaults to None,
+                       in which case cvxpy picks a solver suited to the problem class
+                       (OSQP for quadratic programs).
+        :type solver: str, optional
         """
         super().__init__(n_assets, tickers)
+        self._solver = solver
+        # Vector of ones, shared by the analytic solutions and the scipy initial guess
+        self._ones = np.ones(n_assets)
+        self._ones.setflags(write=False)
 
         # Optimisation variables
         self._w = cp.Variable(n_assets)
+        self._opt = None
         self._objective = None
         self._additional_objectives = []
         self._constraints = []
         self._lower_bounds = None
         self._upper_bounds = None
+        self._has_short_bound = False
         self._map_bounds_to_constraints(weight_bounds)
+        # The bounds and the constraints added by the user come first in _constraints,
+        # followed by any constraints added by the optimisation methods
+        self._n_user_constraints = len(self._constraints)
 
     def _map_bounds_to_constraints(self, test_bounds):
         """
         Process input bounds into a form acceptable by cvxpy and add to the constraints list.
+        The bound constraints always occupy the first two slots of the list, so any
+        existing bound constraints are replaced in place.
 
         :param test_bounds: minimum and maximum weight of each asset OR single min/max pair
                             if all identical OR pair of arrays corresponding to lower/upper bounds. defaults to (0, 1).
@@ -181,22 +220,46 @@ class BaseConvexOptimizer(BaseOptimizer):
                 self._lower_bounds = np.nan_to_num(lower, nan=-1)
                 self._upper_bounds = np.nan_to_num(upper, nan=1)
 
-        self._constraints.append(self._w >= self._lower_bounds)
-        self._constraints.append(self._w <= self._upper_bounds)
+        # Cached so that market-neutral and sector checks need not rescan the bounds
+        self._has_short_bound = bool(np.any(self._lower_bounds < 0))
+
+        self._constraints[:2] = [
+            self._w >= self._lower_bounds,
+            self._w <= self._upper_bounds,
+        ]
 
-    def _solve_cvxpy_opt_problem(self):
+    def _make_cvxpy_opt_problem(self):
+        """
+        Helper method to build the cvxpy problem from the current objective and
+        constraints, without solving it.
+
+        :raises exceptions.OptimizationError: if the problem cannot be built
+        """
+        try:
+            self._opt = cp.Problem(cp.Minimize(self._objective), self._constraints)
+        except (TypeError, cp.DCPError):
+            raise exceptions.OptimizationError
+
+    def _solve_cvxpy_opt_problem(self, reuse_problem=False):
         """
         Helper method to solve the cvxpy problem and check output,
         once objectives and constraints have been defined
 
+        :param reuse_problem: whether to re-solve the previous problem (e.g after changing
+                              the value of a cp.Parameter), which lets cvxpy skip compiling
+                              it again. Defaults to False, in which case a new problem is built.
+        :type reuse_problem: bool, optional
         :raises exceptions.OptimizationError: if problem is not solvable by cvxpy
         """
+        if not reuse_problem or self._opt is None:
+            self._make_cvxpy_opt_problem()
         try:
-            opt = cp.Problem(cp.Minimize(self._objective), self._constraints)
-            opt.solve()
-        except (TypeError, cp.DCPError):
+            # Solver-level warm starts (cvxpy's default for re-solves) give less
+            # accurate OSQP solutions, e.g long-only weights of -1e-6.
+            self._opt.solve(solver=self._solver, warm_start=False)
+        except (TypeError, cp.DCPError, cp.SolverError):
             raise exceptions.OptimizationError
-        if opt.status != "optimal":
+        if self._opt.status != "optimal":
             raise exceptions.OptimizationError
         self.weights = self._w.value.round(16) + 0.0  # +0.0 removes signed zero
 
@@ -216,6 +279,7 @@ class BaseConvexOptimizer(BaseOptimizer):
         :type new_objective: cp.Expression (i.e function of cp.Variable)
         """
         self._additional_objectives.append(new_objective(self._w, **kwargs))
+        self._opt = None
 
     def add_constraint(self, new_constraint):
         """
@@ -233,7 +297,19 @@ class BaseConvexOptimizer(BaseOptimizer):
         """
         if not callable(new_constraint):
             raise TypeError("New constraint must be provided as a lambda function")
-        self._constraints.append(new_constraint(self._w))
+        self._add_user_constraint(new_constraint(self._w))
+        self._opt = None
+
+    def _add_user_constraint(self, constraint):
+        """
+        Helper method to add a constraint ahead of those added by optimisation methods,
+        so that the latter can be discarded without losing it.
+
+        :param constraint: the constraint to be added
+        :type constraint: cp.Constraint
+        """
+        self._constraints.insert(self._n_user_constraints, constraint)
+        self._n_user_constraints += 1
 
     def add_sector_constraints(self, sector_mapper, sector_lower, sector_upper):
         """
@@ -263,16 +339,21 @@ class BaseConvexOptimizer(BaseOptimizer):
         :param sector_upper: upper bounds for each sector
         :type sector_upper: {str:float} dict
         """
-        if np.any(self._lower_bounds < 0):
+        if self._has_short_bound:
             warnings.warn(
                 "Sector constraints may not produce reasonable results if shorts are allowed."
             )
         for sector in sector_upper:
             is_sector = [sector_mapper[t] == sector for t in self.tickers]
-            self._constraints.append(cp.sum(self._w[is_sector]) <= sector_upper[sector])
+            self._add_user_constraint(
+                cp.sum(self._w[is_sector]) <= sector_upper[sector]
+            )
         for sector in sector_lower:
             is_sector = [sector_mapper[t] == sector for t in self.tickers]
-            self._constraints.append(cp.sum(self._w[is_sector]) >= sector_lower[sector])
+            self._add_user_constraint(
+                cp.sum(self._w[is_sector]) >= sector_lower[sector]
+            )
+        self._opt = None
 
     def convex_objective(self, custom_objective, weights_sum_to_one=True, **kwargs):
         """
@@ -305,7 +386,7 @@ class BaseConvexOptimizer(BaseOptimizer):
             self._constraints.append(cp.sum(self._w) == 1)
 
         self._solve_cvxpy_opt_problem()
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def nonconvex_objective(
         self,
@@ -314,6 +395,7 @@ class BaseConvexOptimizer(BaseOptimizer):
         weights_sum_to_one=True,
         constraints=None,
         solver="SLSQP",
+        jac=None,
     ):
         """
         Optimise some objective function using the scipy backend. This can
@@ -322,10 +404,11 @@ class BaseConvexOptimizer(BaseOptimizer):
 
             # Market-neutral efficient risk
             constraints = [
-                {"type": "eq", "fun": lambda w: np.sum(w)},  # weights sum to zero
+                {"type": "eq", "fun": np.sum, "jac": np.ones_like},  # weights sum to zero
                 {
                     "type": "eq",
                     "fun": lambda w: target_risk ** 2 - np.dot(w.T, np.dot(ef.cov_matrix, w)),
+                    "jac": lambda w: -2 * np.dot(ef.cov_matrix, w),
                 },  # risk = target_risk
             ]
             ef.nonconvex_objective(
@@ -333,6 +416,7 @@ class BaseConvexOptimizer(BaseOptimizer):
                 objective_args=(ef.expected_returns,),
                 weights_sum_to_one=False,
                 constraints=constraints,
+                jac=lambda w, mu: -mu,
             )
 
         :param objective_function: an objective function to be MINIMISED. This function
@@ -347,6 +431,10 @@ class BaseConvexOptimizer(BaseOptimizer):
         :param solver: which SCIPY solver to use, e.g "SLSQP", "COBYLA", "BFGS".
                        User beware: different optimisers require different inputs.
         :type solver: string
+        :param jac: gradient of the objective function, with the same signature as the
+                    objective. If not provided, gradient-based solvers fall back to finite
+                    differences, which costs n_assets + 1 objective evaluations per iteration.
+        :type jac: function with signature (np.ndarray, args) -> np.ndarray, optional
         :return: asset weights that optimise the custom objective
         :rtype: dict
         """
@@ -358,12 +446,10 @@ class BaseConvexOptimizer(BaseOptimizer):
         bound_array = np.vstack((self._lower_bounds, self._upper_bounds)).T
         bounds = list(map(tuple, bound_array))
 
-        initial_guess = np.array([1 / self.n_assets] * self.n_assets)
+        initial_guess = self._ones / self.n_assets
 
         # Construct constraints
-        final_constraints = []
-        if weights_sum_to_one:
-            final_constraints.append({"type": "eq", "fun": lambda x: np.sum(x) - 1})
+        final_constraints = [_WEIGHTS_SUM_TO_ONE] if weights_sum_to_one else []
         if constraints is not None:
             final_constraints += constraints
 
@@ -371,12 +457,13 @@ class BaseConvexOptimizer(BaseOptimizer):
             custom_objective,
             x0=initial_guess,
             args=objective_args,
+            jac=jac,
             method=solver,
             bounds=bounds,
             constraints=final_constraints,
         )
         self.weights = result["x"]
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
 
 def portfolio_performance(
@@ -420,20 +507,41 @@ def portfolio_performance(
     else:
         raise ValueError("Weights is None")
 
-    sigma = np.sqrt(objective_functions.portfolio_variance(new_weights, cov_matrix))
+    return _portfolio_performance(
+        new_weights, expected_returns, cov_matrix, verbose, risk_free_rate
+    )
+
+
+def _portfolio_performance(
+    weights, expected_returns, cov_matrix, verbose, risk_free_rate
+):
+    """
+    Helper function for ``portfolio_performance`` once the weights are an array in the
+    same order as ``expected_returns`` and ``cov_matrix``. Optimisers whose inputs are
+    already arrays call this directly, skipping the input conversion.
+
+    :param weights: asset weights
+    :type weights: np.ndarray
+    :param expected_returns: expected returns for each asset, or None
+    :type expected_returns: np.ndarray or pd.Series
+    :param cov_matrix: covariance of returns for each asset
+    :type cov_matrix: np.array or pd.DataFrame
+    :param verbose: whether performance should be printed
+    :type verbose: bool
+    :param risk_free_rate: risk-free rate of borrowing/lending
+    :type risk_free_rate: float
+    :return: expected return, volatility, Sharpe ratio.
+    :rtype: (float, float, float)
+    """
+    sigma = np.sqrt(objective_functions.portfolio_variance(weights, cov_matrix))
 
     if expected_returns is not None:
         mu = objective_functions.portfolio_return(
-            new_weights, expected_returns, negative=False
+            weights, expected_returns, negative=False
         )
 
-        sharpe = objective_functions.sharpe_ratio(
-            new_weights,
-            expected_returns,
-            cov_matrix,
-            risk_free_rate=risk_free_rate,
-            negative=False,
-        )
+        # Reuse the volatility rather than recomputing w^T S w via sharpe_ratio()
+        sharpe = (mu - risk_free_rate) / sigma
         if verbose:
             print("Expected annual return: {:.1f}%".format(100 * mu))
             print("Annual volatility: {:.1f}%".format(100 * sigma))
@@ -10,6 +10,7 @@ views. In addition, two utility functions are defined, which calculate:
 import warnings
 import numpy as np
 import pandas as pd
+import scipy.linalg as sla
 from . import base_optimizer
 
 
@@ -190,6 +191,8 @@ class BlackLittermanModel(base_optimizer.BaseOptimizer):
         # Private intermediaries
         self._tau_sigma_P = None
         self._A = None
+        # (cov_matrix, Cholesky factor or None if cov_matrix is singular)
+        self._cov_cholesky = None
 
         self.posterior_rets = None
         self.posterior_cov = None
@@ -432,11 +435,26 @@ class BlackLittermanModel(base_optimizer.BaseOptimizer):
             risk_aversion = self.risk_aversion
 
         self.posterior_rets = self.bl_returns()
-        A = risk_aversion * self.cov_matrix
-        b = self.posterior_rets
-        raw_weights = np.linalg.solve(A, b)
+        b = self.posterior_rets.values
+
+        # Factorise the covariance matrix once, so that sweeping over risk_aversion
+        # only costs a triangular solve: (delta * S)^-1 b = S^-1 b / delta.
+        # The factor is recomputed if cov_matrix is reassigned.
+        if self._cov_cholesky is None or self._cov_cholesky[0] is not self.cov_matrix:
+            try:
+                factor = sla.cho_factor(self.cov_matrix, lower=True)
+            except np.linalg.LinAlgError:
+                factor = None
+            self._cov_cholesky = (self.cov_matrix, factor)
+
+        factor = self._cov_cholesky[1]
+        if factor is not None:
+            raw_weights = sla.cho_solve(factor, b) / risk_aversion
+        else:
+            # Singular (positive semidefinite) covariance matrix
+            raw_weights = np.linalg.solve(risk_aversion * self.cov_matrix, b)
         self.weights = raw_weights / raw_weights.sum()
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def optimize(self, risk_aversion=None):
         """
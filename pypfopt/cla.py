@@ -391,7 +391,7 @@ class CLA(base_optimizer.BaseOptimizer):
             sr.append(b)
 
         self.weights = w_sr[sr.index(max(sr))].reshape((self.n_assets,))
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def min_volatility(self):
         """
@@ -408,7 +408,7 @@ class CLA(base_optimizer.BaseOptimizer):
             var.append(a)
         # return min(var)**.5, self.w[var.index(min(var))]
         self.weights = self.w[var.index(min(var))].reshape((self.n_assets,))
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def efficient_frontier(self, points=100):
         """
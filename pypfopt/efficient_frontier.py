@@ -3,14 +3,155 @@ The ``efficient_frontier`` module houses the EfficientFrontier class, which
 generates optimal portfolios for various possible objective functions and parameters.
 """
 
+import hashlib
 import warnings
+from collections import OrderedDict, namedtuple
 import numpy as np
 import pandas as pd
 import cvxpy as cp
+import scipy.linalg as sla
 
 from . import objective_functions, base_optimizer
 
 
+FrontierSample = namedtuple(
+    "FrontierSample", ["weights", "returns", "volatilities", "sharpe_ratios"]
+)
+FrontierSample.__doc__ = """
+Portfolios sampled along the efficient frontier, stored as one array per quantity:
+``weights`` is an (M, N) array with one row per portfolio, and ``returns``,
+``volatilities`` and ``sharpe_ratios`` are length-M arrays.
+"""
+
+
+# Number of rank-one updates of the inverse covariance (see update_returns) after which
+# it is recomputed from scratch, to stop rounding errors accumulating.
+_COV_INVERSE_REFRESH_INTERVAL = 50
+
+# The factorisations below are cached across instances, since the same inputs are often
+# used to build many EfficientFrontier objects (e.g in a backtest). Entries are keyed by
+# a fixed-size digest of the inputs, so the caches only hold the results, and the least
+# recently used entry is dropped once a cache is full. Cached arrays are read-only
+# because they are shared.
+_CACHE_SIZE = 32
+_cholesky_cache = OrderedDict()
+_frontier_params_cache = OrderedDict()
+
+
+def _array_key(*arrays):
+    """
+    Compute a cache key for some arrays from a digest of their contents and their shapes.
+
+    :param arrays: C-contiguous float64 arrays
+    :type arrays: np.ndarray
+    :return: cache key
+    :rtype: tuple
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for arr in arrays:
+        digest.update(arr)
+    return (digest.digest(),) + tuple(arr.shape for arr in arrays)
+
+
+def _cache_lookup(cache, key, compute):
+    """
+    Get the entry for ``key`` from a least-recently-used cache, computing it on a miss.
+
+    :param cache: the cache
+    :type cache: OrderedDict
+    :param key: cache key
+    :type key: tuple
+    :param compute: function computing the entry
+    :type compute: function with signature () -> object
+    :return: the cached entry
+    :rtype: object
+    """
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = compute()
+    cache[key] = value
+    if len(cache) > _CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+def _cached_cholesky(cov_matrix):
+    """
+    Compute the lower-triangular Cholesky factor of a covariance matrix.
+
+    :param cov_matrix: covariance matrix
+    :type cov_matrix: np.ndarray (C-contiguous, float64)
+    :return: Cholesky factor, or None if the covariance matrix is not positive definite.
+    :rtype: np.ndarray or None
+    """
+
+    def compute():
+        try:
+            L = np.linalg.cholesky(cov_matrix)
+        except np.linalg.LinAlgError:
+            return None
+        L.setflags(write=False)
+        return L
+
+    return _cache_lookup(_cholesky_cache, _array_key(cov_matrix), compute)
+
+
+def _cached_frontier_params(cov_matrix, mu):
+    """
+    Compute the parameters of the frontier in which the only constraint is that weights
+    sum to one. By the two-fund theorem, every portfolio on this frontier is
+    ``f + target_return * g``.
+
+    :param cov_matrix: covariance matrix
+    :type cov_matrix: np.ndarray (C-contiguous, float64)
+    :param mu: expected returns
+    :type mu: np.ndarray (C-contiguous, float64)
+    :return: f, g, and the return of the minimum variance portfolio,
+             or None if the frontier is degenerate.
+    :rtype: (np.ndarray, np.ndarray, float) or None
+    """
+
+    def compute():
+        L = _cached_cholesky(cov_matrix)
+        if L is None:
+            return None
+        params = _two_fund_params(
+            sla.cho_solve((L, True), np.column_stack((np.ones(len(mu)), mu))), mu
+        )
+        if params is not None:
+            params[0].setflags(write=False)
+            params[1].setflags(write=False)
+        return params
+
+    return _cache_lookup(_frontier_params_cache, _array_key(cov_matrix, mu), compute)
+
+
+def _two_fund_params(X, mu):
+    r"""
+    Compute the two-fund frontier parameters from the solutions of :math:`\Sigma x = 1`
+    and :math:`\Sigma x = \mu`.
+
+    :param X: the two solutions, stacked as columns
+    :type X: np.ndarray
+    :param mu: expected returns
+    :type mu: np.ndarray
+    :return: f, g, and the return of the minimum variance portfolio,
+             or None if the frontier is degenerate.
+    :rtype: (np.ndarray, np.ndarray, float) or None
+    """
+    Qu, Qr = X[:, 0], X[:, 1]
+    a11 = Qu.sum()
+    a12 = mu @ Qu
+    a22 = mu @ Qr
+    d = a11 * a22 - a12 ** 2
+    if d <= 0:
+        return None
+    f = (a22 * Qu - a12 * Qr) / d
+    g = (a11 * Qr - a12 * Qu) / d
+    return f, g, a12 / a11
+
+
 class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
 
     """
@@ -18,6 +159,8 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
     optimisation methods that can be called (corresponding to different objective
     functions) with various parameters. Note: a new EfficientFrontier object should
     be instantiated if you want to make any change to objectives/constraints/bounds/parameters.
+    The exception is the target of ``efficient_risk()`` and ``efficient_return()``, which can
+    be changed between calls to trace out the frontier.
 
     Instance variables:
 
@@ -48,12 +191,17 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
 
     - ``portfolio_performance()`` calculates the expected return, volatility and Sharpe ratio for
       the optimised portfolio.
+    - ``portfolio_performance_batch()`` calculates the expected return, volatility and Sharpe
+      ratio for many portfolios at once.
+    - ``sample_frontier()`` computes the efficient portfolios for an array of target returns.
     - ``set_weights()`` creates self.weights (np.ndarray) from a weights dict
     - ``clean_weights()`` rounds the weights and clips near-zeros.
     - ``save_weights_to_file()`` saves the weights to csv, json, or txt.
     """
 
-    def __init__(self, expected_returns, cov_matrix, weight_bounds=(0, 1), gamma=0):
+    def __init__(
+        self, expected_returns, cov_matrix, weight_bounds=(0, 1), gamma=0, solver=None
+    ):
         """
         :param expected_returns: expected returns for each asset. Can be None if
                                 optimising for volatility only (but not recommended).
@@ -68,28 +216,55 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         :param gamma: L2 regularisation parameter, defaults to 0. Increase if you want more
                       non-negligible weights
         :type gamma: float, optional
+        :param solver: name of the cvxpy solver to use (e.g "OSQP", "ECOS"), defaults to None.
+                       ``min_volatility()`` and ``efficient_return()`` are quadratic programs,
+                       which cvxpy dispatches to OSQP by default.
+        :type solver: str, optional
         :raises TypeError: if ``expected_returns`` is not a series, list or array
         :raises TypeError: if ``cov_matrix`` is not a dataframe or array
+        :raises ValueError: if ``cov_matrix`` is not a symmetric square matrix matching
+                            ``expected_returns``
         """
-        # Inputs
+        # Inputs are converted once to contiguous float64 arrays, so no other method
+        # needs to handle pandas objects. Labels are kept separately as tickers.
         self.cov_matrix = EfficientFrontier._validate_cov_matrix(cov_matrix)
         self.expected_returns = EfficientFrontier._validate_expected_returns(
             expected_returns
         )
 
+        n_assets = self.cov_matrix.shape[0]
+        if self.cov_matrix.ndim != 2 or self.cov_matrix.shape[1] != n_assets:
+            raise ValueError("Covariance matrix must be square")
+        if not np.allclose(self.cov_matrix, self.cov_matrix.T):
+            raise ValueError("Covariance matrix must be symmetric")
+        if (
+            self.expected_returns is not None
+            and len(self.expected_returns) != n_assets
+        ):
+            raise ValueError("Covariance matrix does not match expected returns")
+
         # Labels
         if isinstance(expected_returns, pd.Series):
             tickers = list(expected_returns.index)
         elif isinstance(cov_matrix, pd.DataFrame):
             tickers = list(cov_matrix.columns)
         else:  # use integer labels
-            tickers = list(range(len(expected_returns)))
-
-        if expected_returns is not None:
-            if cov_matrix.shape != (len(expected_returns), len(expected_returns)):
-                raise ValueError("Covariance matrix does not match expected returns")
-
-        super().__init__(len(tickers), tickers, weight_bounds)
+            tickers = list(range(n_assets))
+
+        super().__init__(n_assets, tickers, weight_bounds, solver=solver)
+
+        # The last efficient_risk/efficient_return problem, kept for re-solves
+        self._sweep = None
+        # The bounds and user constraints, before max_sharpe() transformed them
+        self._untransformed_constraints = None
+        # (cov_matrix, Cholesky factor) and (cov_matrix, expected_returns, frontier
+        # parameters) for the current inputs, so that repeated analytic calls skip
+        # hashing the inputs to look them up in the shared caches
+        self._cholesky_memo = None
+        self._frontier_memo = None
+        # (cov_matrix, inverse) maintained by update_returns
+        self._cov_inverse = None
+        self._n_cov_updates = 0
 
     @staticmethod
     def _validate_expected_returns(expected_returns):
@@ -99,11 +274,11 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
             )
             return None
         elif isinstance(expected_returns, pd.Series):
-            return expected_returns.values
+            return np.ascontiguousarray(expected_returns.values, dtype=np.float64)
         elif isinstance(expected_returns, list):
-            return np.array(expected_returns)
+            return np.array(expected_returns, dtype=np.float64)
         elif isinstance(expected_returns, np.ndarray):
-            return expected_returns.ravel()
+            return np.ascontiguousarray(expected_returns.ravel(), dtype=np.float64)
         else:
             raise TypeError("expected_returns is not a series, list or array")
 
@@ -112,9 +287,9 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         if cov_matrix is None:
             raise ValueError("cov_matrix must be provided")
         elif isinstance(cov_matrix, pd.DataFrame):
-            return cov_matrix.values
+            return np.ascontiguousarray(cov_matrix.values, dtype=np.float64)
         elif isinstance(cov_matrix, np.ndarray):
-            return cov_matrix
+            return np.ascontiguousarray(cov_matrix, dtype=np.float64)
         else:
             raise TypeError("cov_matrix is not a series, list or array")
 
@@ -123,24 +298,309 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         Helper method to make sure bounds are suitable for a market neutral
         optimisation.
         """
-        portfolio_possible = np.any(self._lower_bounds < 0)
-        if not portfolio_possible:
+        if not self._has_short_bound:
             warnings.warn(
                 "Market neutrality requires shorting - bounds have been amended",
                 RuntimeWarning,
             )
+            # Replaces the original bound constraints
             self._map_bounds_to_constraints((-1, 1))
-            # Delete original constraints
-            del self._constraints[0]
-            del self._constraints[0]
+
+    def _user_constraints(self):
+        """
+        Helper method to get the bounds and the constraints added by the user, i.e
+        excluding those added by previous optimisation method calls.
+
+        :return: constraints
+        :rtype: list
+        """
+        if self._untransformed_constraints is not None:
+            return list(self._untransformed_constraints)
+        return self._constraints[: self._n_user_constraints]
+
+    def _discard_method_constraints(self):
+        """
+        Helper method to remove the constraints added by previous optimisation method
+        calls (e.g the target of ``efficient_risk()``), e.g because they were built from
+        inputs that have since changed.
+        """
+        self._constraints = self._user_constraints()
+        self._n_user_constraints = len(self._constraints)
+        self._untransformed_constraints = None
+        self._opt = None
+        self._sweep = None
+
+    def _add_weight_sum_constraint(self, market_neutral):
+        """
+        Helper method to add the equality constraint, which is either "weights sum to 1"
+        (default), or "weights sum to 0" (market neutral).
+
+        :param market_neutral: whether the portfolio should be market neutral
+        :type market_neutral: bool
+        """
+        if market_neutral:
+            self._market_neutral_bounds_check()
+            self._constraints.append(cp.sum(self._w) == 0)
+        else:
+            self._constraints.append(cp.sum(self._w) == 1)
+
+    def _cholesky_factor(self):
+        """
+        Helper method to get the Cholesky factorisation of the covariance matrix. This is
+        looked up by the current value of ``cov_matrix``, so it is computed once for all
+        instances using the same covariance matrix.
+
+        :return: lower-triangular Cholesky factor, or None if the covariance matrix
+                 is not positive definite.
+        :rtype: np.ndarray or None
+        """
+        memo = self._cholesky_memo
+        if memo is not None and memo[0] is self.cov_matrix:
+            return memo[1]
+        L = _cached_cholesky(np.ascontiguousarray(self.cov_matrix, dtype=np.float64))
+        self._cholesky_memo = (self.cov_matrix, L)
+        return L
+
+    def _cov_solve(self, b):
+        r"""
+        Helper method to solve :math:`\Sigma x = b` using the inverse maintained by
+        ``update_returns()`` if there is one, otherwise the cached Cholesky factor.
+
+        :param b: right-hand side (vector or matrix)
+        :type b: np.ndarray
+        :return: solution x, or None if the covariance matrix is not positive definite.
+        :rtype: np.ndarray or None
+        """
+        Q = self._maintained_cov_inverse()
+        if Q is not None:
+            return Q @ b
+        L = self._cholesky_factor()
+        if L is None:
+            return None
+        return sla.cho_solve((L, True), b)
+
+    def _min_volatility_closed_form(self):
+        r"""
+        Helper method to compute the analytic minimum variance portfolio subject only to
+        the weights summing to one, i.e :math:`w = \Sigma^{-1} 1 / (1^T \Sigma^{-1} 1)`.
+
+        :return: asset weights, or None if the covariance matrix is not positive definite
+                 or the analytic solution violates the weight bounds.
+        :rtype: np.ndarray or None
+        """
+        x = self._cov_solve(self._ones)
+        if x is None:
+            return None
+        weights = x / x.sum()
+        if np.all(weights >= self._lower_bounds) and np.all(
+            weights <= self._upper_bounds
+        ):
+            return weights
+        return None
+
+    def _precompute_frontier(self):
+        """
+        Helper method to get the parameters of the frontier in which the only constraint
+        is that weights sum to one. By the two-fund theorem, every portfolio on this
+        frontier is ``f + target_return * g``.
+
+        :return: f, g, and the return of the minimum variance portfolio,
+                 or None if the frontier is degenerate.
+        :rtype: (np.ndarray, np.ndarray, float) or None
+        """
+        memo = self._frontier_memo
+        if (
+            memo is not None
+            and memo[0] is self.cov_matrix
+            and memo[1] is self.expected_returns
+        ):
+            return memo[2]
+
+        if self._maintained_cov_inverse() is not None:
+            X = self._cov_solve(np.column_stack((self._ones, self.expected_returns)))
+            params = _two_fund_params(X, self.expected_returns)
+        else:
+            cov_matrix = np.ascontiguousarray(self.cov_matrix, dtype=np.float64)
+            mu = np.ascontiguousarray(self.expected_returns, dtype=np.float64)
+            params = _cached_frontier_params(cov_matrix, mu)
+        self._frontier_memo = (self.cov_matrix, self.expected_returns, params)
+        return params
+
+    def _maintained_cov_inverse(self):
+        """
+        Helper method to get the inverse covariance matrix maintained by
+        ``update_returns()``, provided ``cov_matrix`` has not been replaced since.
+
+        :return: inverse covariance matrix, or None
+        :rtype: np.ndarray or None
+        """
+        if self._cov_inverse is None or self._cov_inverse[0] is not self.cov_matrix:
+            return None
+        return self._cov_inverse[1]
+
+    def update_returns(
+        self,
+        new_returns,
+        old_returns,
+        window_mean,
+        window_length,
+        frequency=252,
+        set_expected_returns=True,
+    ):
+        """
+        Roll the sample covariance matrix forward by one period: ``old_returns`` leaves
+        the window of returns it was estimated from, and ``new_returns`` joins it. The
+        result matches ``risk_models.sample_cov`` on the new window. By default,
+        ``expected_returns`` is also set to the annualised mean of the new window (i.e
+        ``expected_returns.mean_historical_return`` without compounding). If you use a
+        different model of expected returns, pass ``set_expected_returns=False`` and
+        assign ``expected_returns`` yourself before optimising.
+
+        The inverse covariance matrix is kept up to date with two Sherman-Morrison
+        updates, so the analytic solutions of ``min_volatility()``, ``efficient_return()``
+        and ``sample_frontier()`` cost :math:`O(N^2)` per update rather than a new
+        :math:`O(N^3)` factorisation. The inverse is recomputed from scratch every
+        ``_COV_INVERSE_REFRESH_INTERVAL`` updates to stop rounding errors accumulating.
+        Constraints added by previous optimisations (e.g the target of
+        ``efficient_risk()``) are discarded, but constraints and objectives added by the
+        user are kept as they are, i.e they are *not* updated.
+
+        :param new_returns: returns for the period joining the window
+        :type new_returns: pd.Series or np.ndarray
+        :param old_returns: returns for the period leaving the window
+        :type old_returns: pd.Series or np.ndarray
+        :param window_mean: mean returns over the current window (before the update)
+        :type window_mean: pd.Series or np.ndarray
+        :param window_length: number of periods in the window
+        :type window_length: int
+        :param frequency: number of time periods in a year, defaults to 252 (the number
+                          of trading days in a year)
+        :type frequency: int, optional
+        :param set_expected_returns: whether to set ``expected_returns`` to
+                                     ``frequency`` times the new window mean,
+                                     defaults to True
+        :type set_expected_returns: bool, optional
+        :raises ValueError: if ``window_length`` is less than 3
+        :return: mean returns over the new window (not annualised)
+        :rtype: np.ndarray
+        """
+        if window_length < 3:
+            raise ValueError("window_length should be at least 3")
+        x_new = np.asarray(new_returns, dtype=np.float64).ravel()
+        x_old = np.asarray(old_returns, dtype=np.float64).ravel()
+        mean = np.asarray(window_mean, dtype=np.float64).ravel()
+        T = window_length
+
+        # Welford-style updates: remove x_old from the window, then add x_new, i.e
+        # cov_new = cov - u u^T + v v^T
+        mean_removed = (T * mean - x_old) / (T - 1)
+        u = np.sqrt(frequency * T) / (T - 1) * (x_old - mean)
+        v = np.sqrt(frequency / T) * (x_new - mean_removed)
+
+        Q = self._maintained_cov_inverse()
+        if Q is None:
+            Q = self._cov_solve(np.eye(self.n_assets))
+            self._n_cov_updates = 0
+        if Q is not None and self._n_cov_updates < _COV_INVERSE_REFRESH_INTERVAL:
+            # Sherman-Morrison, adding v v^T first so the matrix stays positive definite
+            Qv = Q @ v
+            Q = Q - np.outer(Qv, Qv) / (1 + v @ Qv)
+            Qu = Q @ u
+            denom = 1 - u @ Qu
+            Q = Q + np.outer(Qu, Qu) / denom if denom > 1e-12 else None
+        else:
+            Q = None
+
+        self.cov_matrix = self.cov_matrix + np.outer(v, v) - np.outer(u, u)
+        if Q is None:
+            Q = self._cov_solve(np.eye(self.n_assets))
+            self._n_cov_updates = 0
+        else:
+            self._n_cov_updates += 1
+        self._cov_inverse = None if Q is None else (self.cov_matrix, Q)
+
+        new_mean = mean + (x_new - x_old) / T
+        if set_expected_returns:
+            self.expected_returns = frequency * new_mean
+
+        # Constraints added by earlier optimisations were built with the old inputs
+        self._discard_method_constraints()
+        return new_mean
+
+    @staticmethod
+    def clear_cache():
+        """
+        Clear the factorisations of covariance matrices (and frontier parameters) that are
+        shared between EfficientFrontier instances built from the same inputs.
+        """
+        _cholesky_cache.clear()
+        _frontier_params_cache.clear()
+
+    def _efficient_return_closed_form(self, target_return):
+        """
+        Helper method to compute the Markowitz portfolio for a target return, subject
+        only to the weights summing to one.
+
+        :param target_return: the desired return of the resulting portfolio.
+        :type target_return: float
+        :return: asset weights, or None if the frontier is degenerate or the analytic
+                 solution violates the weight bounds.
+        :rtype: np.ndarray or None
+        """
+        params = self._precompute_frontier()
+        if params is None:
+            return None
+        f, g, min_variance_return = params
+        # The return constraint is an inequality, so targets below the return of the
+        # minimum variance portfolio are not binding.
+        weights = f + max(target_return, min_variance_return) * g
+        if np.all(weights >= self._lower_bounds) and np.all(
+            weights <= self._upper_bounds
+        ):
+            return weights
+        return None
+
+    def _resolve_sweep(self, method, market_neutral, target_value):
+        """
+        Helper method to re-solve the previous ``efficient_risk()``/``efficient_return()``
+        problem with a new target, if it was built by the same method with the same options
+        and nothing has been added since. Only the target parameter changes, so cvxpy
+        reuses the compiled problem.
+
+        :param method: name of the calling method
+        :type method: str
+        :param market_neutral: whether the portfolio should be market neutral
+        :type market_neutral: bool
+        :param target_value: new value of the target parameter
+        :type target_value: float
+        :return: whether the previous problem was re-solved
+        :rtype: bool
+        """
+        if self._sweep is None:
+            return False
+        key, problem, target_param = self._sweep
+        if key != (method, market_neutral) or problem is not self._opt:
+            return False
+        target_param.value = target_value
+        self._solve_cvxpy_opt_problem(reuse_problem=True)
+        return True
 
     def min_volatility(self):
         """
-        Minimise volatility.
+        Minimise volatility. If there are no constraints or objectives other than
+        the weight bounds, and the bounds are not binding, the analytic solution
+        is used and no solver is called.
 
         :return: asset weights for the volatility-minimising portfolio
         :rtype: dict
         """
+        # Only the two weight bound constraints are present
+        if len(self._constraints) == 2 and not self._additional_objectives:
+            weights = self._min_volatility_closed_form()
+            if weights is not None:
+                self.weights = weights
+                return self._make_output_weights()
+
         self._objective = objective_functions.portfolio_variance(
             self._w, self.cov_matrix
         )
@@ -150,7 +610,7 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         self._constraints.append(cp.sum(self._w) == 1)
 
         self._solve_cvxpy_opt_problem()
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def max_sharpe(self, risk_free_rate=0.02):
         """
@@ -185,6 +645,9 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         for obj in self._additional_objectives:
             self._objective += obj
 
+        if self._untransformed_constraints is None:
+            self._untransformed_constraints = self._user_constraints()
+
         new_constraints = []
         # Must rebuild the constraints
         for constr in self._constraints:
@@ -213,7 +676,7 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         self._solve_cvxpy_opt_problem()
         # Inverse-transform
         self.weights = (self._w.value / k.value).round(16) + 0.0
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def max_quadratic_utility(self, risk_aversion=1, market_neutral=False):
         r"""
@@ -241,18 +704,19 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         for obj in self._additional_objectives:
             self._objective += obj
 
-        if market_neutral:
-            self._market_neutral_bounds_check()
-            self._constraints.append(cp.sum(self._w) == 0)
-        else:
-            self._constraints.append(cp.sum(self._w) == 1)
+        self._add_weight_sum_constraint(market_neutral)
 
         self._solve_cvxpy_opt_problem()
-        return dict(zip(self.tickers, self.weights))
+        return self._make_output_weights()
 
     def efficient_risk(self, target_volatility, market_neutral=False):
         """
-        Maximise return for a target risk.
+        Maximise return for a target risk. Calling this method again with a different
+        target (and the same ``market_neutral``) re-solves the same problem without
+        compiling it again, so the frontier can be traced with e.g::
+
+            for target in np.linspace(0.16, 0.3, 50):
+                ef.efficient_risk(target)
 
         :param target_volatility: the desired volatility of the resulting portfolio.
         :type target_volatility: float
@@ -268,6 +732,11 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         if not isinstance(target_volatility, float) or target_volatility < 0:
             raise ValueError("target_volatility should be a positive float")
 
+        if self._resolve_sweep(
+            "efficient_risk", market_neutral, target_volatility ** 2
+        ):
+            return self._make_output_weights()
+
         self._objective = objective_functions.portfolio_return(
             self._w, self.expected_returns
         )
@@ -276,22 +745,27 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         for obj in self._additional_objectives:
             self._objective += obj
 
-        self._constraints.append(variance <= target_volatility ** 2)
+        target_variance = cp.Parameter(
+            name="target_variance", value=target_volatility ** 2, nonneg=True
+        )
+        self._constraints.append(variance <= target_variance)
 
-        # The equality constraint is either "weights sum to 1" (default), or
-        # "weights sum to 0" (market neutral).
-        if market_neutral:
-            self._market_neutral_bounds_check()
-            self._constraints.append(cp.sum(self._w) == 0)
-        else:
-            self._constraints.append(cp.sum(self._w) == 1)
+        self._add_weight_sum_constraint(market_neutral)
 
-        self._solve_cvxpy_opt_problem()
-        return dict(zip(self.tickers, self.weights))
+        # Recorded before solving, so that if this target is infeasible the next one
+        # re-solves the same problem instead of adding constraints on top of it
+        self._make_cvxpy_opt_problem()
+        self._sweep = (("efficient_risk", market_neutral), self._opt, target_variance)
+        self._solve_cvxpy_opt_problem(reuse_problem=True)
+        return self._make_output_weights()
 
     def efficient_return(self, target_return, market_neutral=False):
         """
         Calculate the 'Markowitz portfolio', minimising volatility for a given target return.
+        As with ``min_volatility()``, the analytic (two-fund) solution is used if the
+        weight bounds are the only constraints and they are not binding. Otherwise,
+        as with ``efficient_risk()``, repeated calls with different targets re-solve the
+        same problem.
 
         :param target_return: the desired return of the resulting portfolio.
         :type target_return: float
@@ -310,6 +784,19 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
                 "target_return must be lower than the largest expected return"
             )
 
+        if (
+            not market_neutral
+            and len(self._constraints) == 2
+            and not self._additional_objectives
+        ):
+            weights = self._efficient_return_closed_form(target_return)
+            if weights is not None:
+                self.weights = weights
+                return self._make_output_weights()
+
+        if self._resolve_sweep("efficient_return", market_neutral, target_return):
+            return self._make_output_weights()
+
         self._objective = objective_functions.portfolio_variance(
             self._w, self.cov_matrix
         )
@@ -317,25 +804,98 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
             self._w, self.expected_returns, negative=False
         )
 
-        self.objective = cp.quad_form(self._w, self.cov_matrix)
-        ret = self.expected_returns.T @ self._w
-
         for obj in self._additional_objectives:
             self._objective += obj
 
-        self._constraints.append(ret >= target_return)
+        target_return_param = cp.Parameter(name="target_return", value=target_return)
+        self._constraints.append(ret >= target_return_param)
 
-        # The equality constraint is either "weights sum to 1" (default), or
-        # "weights sum to 0" (market neutral).
-        if market_neutral:
-            self._market_neutral_bounds_check()
-            self._constraints.append(cp.sum(self._w) == 0)
-        else:
-            self._constraints.append(cp.sum(self._w) == 1)
+        self._add_weight_sum_constraint(market_neutral)
 
-        self._solve_cvxpy_opt_problem()
+        # Recorded before solving, as in efficient_risk()
+        self._make_cvxpy_opt_problem()
+        self._sweep = (
+            ("efficient_return", market_neutral),
+            self._opt,
+            target_return_param,
+        )
+        self._solve_cvxpy_opt_problem(reuse_problem=True)
+        return self._make_output_weights()
+
+    def sample_frontier(self, target_returns, risk_free_rate=0.02):
+        """
+        Compute the Markowitz portfolio (see ``efficient_return()``) for each of an array of
+        target returns. If the weight bounds are the only constraints, every portfolio
+        that does not hit a bound comes from the two-fund theorem without calling a
+        solver. The remaining targets are solved by repeated ``efficient_return()``
+        calls. Only the bounds and the constraints and objectives added by the user are
+        used, i.e constraints added by previous optimisations (such as the target of
+        ``efficient_risk()``) are ignored. The instance (weights, constraints and
+        objective) is left unchanged.
+
+        :param target_returns: the desired returns of the portfolios.
+        :type target_returns: np.ndarray or list of floats
+        :param risk_free_rate: risk-free rate of borrowing/lending, defaults to 0.02.
+                               The period of the risk-free rate should correspond to the
+                               frequency of expected returns.
+        :type risk_free_rate: float, optional
+        :raises ValueError: if any target return is negative or above the largest
+                            expected return
+        :return: weights (one row per target), returns, volatilities and Sharpe ratios
+        :rtype: FrontierSample
+        """
+        targets = np.asarray(target_returns, dtype=np.float64).ravel()
+        if np.any(targets < 0):
+            raise ValueError("target_returns should be positive")
+        if np.any(targets > self.expected_returns.max()):
+            raise ValueError(
+                "target_returns must be lower than the largest expected return"
+            )
 
-        return dict(zip(self.tickers, self.weights))
+        W = np.empty((len(targets), self.n_assets))
+        unsolved = np.ones(len(targets), dtype=bool)
+        user_constraints = self._user_constraints()
+        params = None
+        if len(user_constraints) == 2 and not self._additional_objectives:
+            params = self._precompute_frontier()
+        if params is not None:
+            f, g, min_variance_return = params
+            W = (
+                f[None, :]
+                + np.maximum(targets, min_variance_return)[:, None] * g[None, :]
+            )
+            unsolved = np.any(
+                (W < self._lower_bounds) | (W > self._upper_bounds), axis=1
+            )
+
+        if unsolved.any():
+            # efficient_return() adds constraints to the instance, so save its state
+            # and put it back afterwards (even if a solve fails)
+            state = (
+                self._constraints,
+                self._objective,
+                self._opt,
+                self._sweep,
+                self.weights,
+            )
+            self._constraints = user_constraints
+            self._opt = None
+            self._sweep = None
+            try:
+                for i in np.flatnonzero(unsolved):
+                    self.efficient_return(float(targets[i]))
+                    W[i] = self.weights
+            finally:
+                (
+                    self._constraints,
+                    self._objective,
+                    self._opt,
+                    self._sweep,
+                    self.weights,
+                ) = state
+
+        rets, sigmas, sharpes = self.portfolio_performance_batch(W, risk_free_rate)
+        return FrontierSample(W, rets, sigmas, sharpes)
 
     def portfolio_performance(self, verbose=False, risk_free_rate=0.02):
         """
@@ -352,10 +912,50 @@ class EfficientFrontier(base_optimizer.BaseConvexOptimizer):
         :return: expected return, volatility, Sharpe ratio.
         :rtype: (float, float, float)
         """
-        return base_optimizer.portfolio_performance(
+        if self.weights is None:
+            raise ValueError("Weights is None")
+        # The weights and inputs are already aligned arrays, so skip the conversion
+        # done by base_optimizer.portfolio_performance
+        return base_optimizer._portfolio_performance(
             self.weights,
             self.expected_returns,
             self.cov_matrix,
             verbose,
             risk_free_rate,
         )
+
+    def portfolio_performance_batch(self, weights, risk_free_rate=0.02):
+        """
+        Calculate the expected return, volatility and Sharpe ratio of many portfolios at
+        once, e.g a sample of portfolios along the efficient frontier. Each row of
+        ``weights`` is a portfolio; all rows are evaluated with a single matrix product
+        rather than a python loop over ``portfolio_performance()``.
+
+        :param weights: portfolio weights, with one row per portfolio and one column per asset.
+                        The columns of a dataframe are matched to the tickers by label.
+        :type weights: np.ndarray or pd.DataFrame
+        :param risk_free_rate: risk-free rate of borrowing/lending, defaults to 0.02.
+                               The period of the risk-free rate should correspond to the
+                               frequency of expected returns.
+        :type risk_free_rate: float, optional
+        :raises ValueError: if ``weights`` does not have one column per asset, or the
+                            columns of a dataframe are not the tickers
+        :return: expected returns, volatilities and Sharpe ratios of the portfolios.
+                 Returns and Sharpe ratios are None if no expected returns were provided.
+        :rtype: (np.ndarray, np.ndarray, np.ndarray)
+        """
+        if isinstance(weights, pd.DataFrame):
+            if set(weights.columns) != set(self.tickers):
+                raise ValueError("weights columns should match the tickers")
+            weights = weights.reindex(columns=self.tickers)
+        W = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        if W.ndim != 2 or W.shape[1] != self.n_assets:
+            raise ValueError("weights should have one column per asset")
+
+        WS = W @ self.cov_matrix
+        sigma = np.sqrt(np.einsum("ij,ij->i", WS, W, optimize=True))
+        if self.expected_returns is None:
+            return None, sigma, None
+        mu = W @ self.expected_returns
+        sharpe = (mu - risk_free_rate) / sigma
+        return mu, sigma, sharpe
@@ -54,6 +54,24 @@ def _objective_value(w, obj):
         return obj
 
 
+def _quad_form(w, cov_matrix):
+    r"""
+    Helper method to compute :math:`w^T \Sigma w`. Building a cvxpy expression only to read
+    off its value is much slower than a matrix-vector product, so numpy weights are
+    evaluated directly.
+
+    :param w: weights
+    :type w: np.ndarray OR cp.Variable
+    :param cov_matrix: covariance matrix
+    :type cov_matrix: np.ndarray
+    :return: value of the quadratic form OR quadratic form expression
+    :rtype: float OR cp.Expression
+    """
+    if isinstance(w, np.ndarray):
+        return np.dot(w, np.dot(cov_matrix, w))
+    return cp.quad_form(w, cov_matrix)
+
+
 def portfolio_variance(w, cov_matrix):
     """
     Calculate the total portfolio variance (i.e square volatility).
@@ -65,7 +83,7 @@ def portfolio_variance(w, cov_matrix):
     :return: value of the objective function OR objective function expression
     :rtype: float OR cp.Expression
     """
-    variance = cp.quad_form(w, cov_matrix)
+    variance = _quad_form(w, cov_matrix)
     return _objective_value(w, variance)
 
 
@@ -107,7 +125,10 @@ def sharpe_ratio(w, expected_returns, cov_matrix, risk_free_rate=0.02, negative=
     :rtype: float
     """
     mu = w @ expected_returns
-    sigma = cp.sqrt(cp.quad_form(w, cov_matrix))
+    if isinstance(w, np.ndarray):
+        sigma = np.sqrt(_quad_form(w, cov_matrix))
+    else:
+        sigma = cp.sqrt(_quad_form(w, cov_matrix))
     sign = -1 if negative else 1
     sharpe = (mu - risk_free_rate) / sigma
     return _objective_value(w, sign * sharpe)
@@ -148,7 +169,7 @@ def quadratic_utility(w, expected_returns, cov_matrix, risk_aversion, negative=T
     """
     sign = -1 if negative else 1
     mu = w @ expected_returns
-    variance = cp.quad_form(w, cov_matrix)
+    variance = _quad_form(w, cov_matrix)
 
     utility = mu - 0.5 * risk_aversion * variance
     return _objective_value(w, sign * utility)
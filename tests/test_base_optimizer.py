@@ -4,6 +4,7 @@ import numpy as np
 import pytest
 from pypfopt import EfficientFrontier
 from pypfopt import exceptions
+from pypfopt import base_optimizer, objective_functions
 from tests.utilities_for_tests import get_data, setup_efficient_frontier
 
 
@@ -202,3 +203,50 @@ def test_save_weights_to_file():
 
     os.remove("tests/test.txt")
     os.remove("tests/test.json")
+
+
+def test_portfolio_performance_matches_objectives():
+    ef = setup_efficient_frontier()
+    ef.max_sharpe()
+    mu, sigma, sharpe = base_optimizer.portfolio_performance(
+        ef.weights, ef.expected_returns, ef.cov_matrix, risk_free_rate=0.03
+    )
+    np.testing.assert_almost_equal(
+        mu, objective_functions.portfolio_return(ef.weights, ef.expected_returns, False)
+    )
+    np.testing.assert_almost_equal(
+        sigma ** 2, objective_functions.portfolio_variance(ef.weights, ef.cov_matrix)
+    )
+    np.testing.assert_almost_equal(
+        sharpe,
+        objective_functions.sharpe_ratio(
+            ef.weights,
+            ef.expected_returns,
+            ef.cov_matrix,
+            risk_free_rate=0.03,
+            negative=False,
+        ),
+    )
+
+
+def test_output_weights_dict():
+    ef = setup_efficient_frontier()
+    w = ef.min_volatility()
+    assert list(w.keys()) == list(ef.tickers)
+    assert all(type(v) is float for v in w.values())
+    np.testing.assert_array_equal(list(w.values()), ef.weights)
+
+
+def test_short_bound_flag():
+    ef = setup_efficient_frontier()
+    assert not ef._has_short_bound
+    ef = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(-0.1, 1)
+    )
+    assert ef._has_short_bound
+
+    # Market neutral optimisation amends long-only bounds
+    ef = setup_efficient_frontier()
+    with pytest.warns(RuntimeWarning):
+        ef.efficient_return(0.25, market_neutral=True)
+    assert ef._has_short_bound
@@ -266,6 +266,37 @@ def test_bl_weights():
     assert w2 == w
 
 
+def test_bl_weights_cached_factorisation():
+    df = get_data()
+    S = risk_models.sample_cov(df)
+    viewdict = {"AAPL": 0.20, "BBY": -0.30, "BAC": 0, "SBUX": -0.2, "T": 0.131321}
+    bl = BlackLittermanModel(S, absolute_views=viewdict)
+
+    bl.bl_weights(1)
+    factor = bl._cov_cholesky
+    for delta in (0.5, 2, 3):
+        bl.bl_weights(delta)
+        assert bl._cov_cholesky is factor
+        raw_weights = np.linalg.solve(delta * bl.cov_matrix, bl.posterior_rets)
+        np.testing.assert_allclose(
+            bl.weights, raw_weights / raw_weights.sum(), atol=1e-12
+        )
+
+    # Reassigning the covariance matrix invalidates the factorisation
+    bl.cov_matrix = bl.cov_matrix * 2 + np.eye(len(S)) * 1e-3
+    bl.bl_weights(1)
+    raw_weights = np.linalg.solve(bl.cov_matrix, bl.posterior_rets)
+    np.testing.assert_allclose(bl.weights, raw_weights / raw_weights.sum(), atol=1e-12)
+
+    # A singular covariance matrix falls back to a general solve
+    S_singular = risk_models.sample_cov(df.dropna().iloc[-15:])
+    with pytest.warns(UserWarning):
+        bl = BlackLittermanModel(S_singular, absolute_views=viewdict)
+    bl.bl_weights(2)
+    raw_weights = np.linalg.solve(2 * bl.cov_matrix, bl.posterior_rets)
+    np.testing.assert_allclose(bl.weights, raw_weights / raw_weights.sum())
+
+
 def test_market_implied_prior():
     df = get_data()
     S = risk_models.sample_cov(df)
@@ -146,6 +146,23 @@ def test_custom_nonconvex_min_var():
     assert original_vol < custom_vol
 
 
+def test_custom_nonconvex_min_var_jac():
+    ef = setup_efficient_frontier()
+    ef.nonconvex_objective(
+        objective_functions.portfolio_variance, objective_args=ef.cov_matrix
+    )
+    w_finite_diff = ef.weights
+
+    ef = setup_efficient_frontier()
+    ef.nonconvex_objective(
+        objective_functions.portfolio_variance,
+        objective_args=ef.cov_matrix,
+        jac=lambda w, cov_matrix: 2 * cov_matrix @ w,
+    )
+    np.testing.assert_almost_equal(ef.weights.sum(), 1)
+    np.testing.assert_allclose(ef.weights, w_finite_diff, atol=1e-3)
+
+
 def test_custom_nonconvex_logarithmic_barrier():
     # 60 Years of Portfolio Optimisation, Kolm et al (2014)
     ef = setup_efficient_frontier()
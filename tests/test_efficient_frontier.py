@@ -6,6 +6,7 @@ import pytest
 import scipy.optimize as sco
 
 from pypfopt import EfficientFrontier
+from pypfopt import efficient_frontier
 from pypfopt import risk_models
 from pypfopt import objective_functions
 from pypfopt import exceptions
@@ -40,6 +41,33 @@ def test_efficient_frontier_inheritance():
     assert isinstance(ef._upper_bounds, np.ndarray)
 
 
+def test_efficient_frontier_input_arrays():
+    mu, S = setup_efficient_frontier(data_only=True)
+    for ef in (
+        EfficientFrontier(mu, S),
+        EfficientFrontier(mu.values.reshape(-1, 1), np.asfortranarray(S.values)),
+        EfficientFrontier(list(mu), S.values.astype(np.float32)),
+    ):
+        for arr in (ef.expected_returns, ef.cov_matrix):
+            assert isinstance(arr, np.ndarray)
+            assert arr.flags["C_CONTIGUOUS"]
+            assert arr.dtype == np.float64
+        assert ef.expected_returns.shape == (ef.n_assets,)
+
+    # Shape and symmetry are validated once, on the converted arrays
+    with pytest.warns(UserWarning):
+        ef = EfficientFrontier(None, S.values)
+    assert ef.tickers == list(range(len(S)))
+    with pytest.raises(ValueError):
+        EfficientFrontier(mu[:-1], S)
+    with pytest.raises(ValueError):
+        EfficientFrontier(mu, S.values[:, :-1])
+    S_asym = S.values.copy()
+    S_asym[0, 1] += 0.1
+    with pytest.raises(ValueError):
+        EfficientFrontier(mu, S_asym)
+
+
 def test_portfolio_performance():
     ef = setup_efficient_frontier()
     with pytest.raises(ValueError):
@@ -51,6 +79,37 @@ def test_portfolio_performance():
     assert isinstance(perf[0], float)
 
 
+def test_portfolio_performance_batch():
+    ef = setup_efficient_frontier()
+    ef.min_volatility()
+    w_minvol = ef.weights
+    ef = setup_efficient_frontier()
+    ef.max_sharpe()
+    w_sharpe = ef.weights
+
+    rets, vols, sharpes = ef.portfolio_performance_batch(
+        np.vstack((w_minvol, w_sharpe))
+    )
+    assert rets.shape == vols.shape == sharpes.shape == (2,)
+    np.testing.assert_allclose(
+        (rets[1], vols[1], sharpes[1]), ef.portfolio_performance()
+    )
+    ef.set_weights(dict(zip(ef.tickers, w_minvol)))
+    np.testing.assert_allclose(
+        (rets[0], vols[0], sharpes[0]), ef.portfolio_performance()
+    )
+
+    # Dataframe columns are matched to the tickers, whatever their order
+    W = pd.DataFrame([w_minvol, w_sharpe], columns=ef.tickers)
+    permuted = W[W.columns[::-1]]
+    np.testing.assert_allclose(ef.portfolio_performance_batch(permuted)[1], vols)
+
+    with pytest.raises(ValueError):
+        ef.portfolio_performance_batch(np.ones((2, ef.n_assets - 1)))
+    with pytest.raises(ValueError):
+        ef.portfolio_performance_batch(W.drop(columns=ef.tickers[0]))
+
+
 def test_min_volatility():
     ef = setup_efficient_frontier()
     w = ef.min_volatility()
@@ -116,6 +175,78 @@ def test_min_volatility_short():
     assert volatility < long_only_volatility
 
 
+def test_min_volatility_closed_form():
+    ef = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    w_analytic = ef._min_volatility_closed_form()
+    assert w_analytic is not None
+
+    # An extra constraint forces the solver path
+    ef_solver = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    ef_solver.add_constraint(lambda x: x <= 1)
+    ef_solver.min_volatility()
+    np.testing.assert_allclose(w_analytic, ef_solver.weights, atol=1e-4)
+
+    # Long-only bounds are binding, so there is no analytic shortcut
+    ef = setup_efficient_frontier()
+    assert ef._min_volatility_closed_form() is None
+
+
+def test_cholesky_factor_cached():
+    ef = setup_efficient_frontier()
+    L = ef._cholesky_factor()
+    np.testing.assert_allclose(L @ L.T, ef.cov_matrix, atol=1e-12)
+    assert ef._cholesky_factor() is L
+
+    # A singular covariance matrix has no Cholesky factor, so the solver is used
+    mu, S = setup_efficient_frontier(data_only=True)
+    S_singular = S.copy()
+    S_singular.iloc[:, 0] = S_singular.iloc[:, 1]
+    S_singular.iloc[0, :] = S_singular.iloc[1, :]
+    ef = EfficientFrontier(mu, S_singular, weight_bounds=(None, None))
+    assert ef._cholesky_factor() is None
+    assert ef._min_volatility_closed_form() is None
+
+
+def test_factorisation_cache():
+    EfficientFrontier.clear_cache()
+    ef = setup_efficient_frontier()
+    params = ef._precompute_frontier()
+
+    # A new instance with the same inputs reuses the cached factorisations
+    ef2 = setup_efficient_frontier()
+    assert ef2._cholesky_factor() is ef._cholesky_factor()
+    assert ef2._precompute_frontier() is params
+    assert not params[0].flags["WRITEABLE"]
+
+    # Changing the inputs gives new factorisations
+    ef2.cov_matrix = ef2.cov_matrix * 2
+    L2 = ef2._cholesky_factor()
+    assert L2 is not ef._cholesky_factor()
+    np.testing.assert_allclose(L2, ef._cholesky_factor() * np.sqrt(2))
+
+    # Repeated calls on an instance skip the shared cache lookup
+    EfficientFrontier.clear_cache()
+    assert ef._precompute_frontier() is params
+    assert len(efficient_frontier._frontier_params_cache) == 0
+
+    ef3 = setup_efficient_frontier()
+    assert ef3._precompute_frontier() is not params
+    np.testing.assert_allclose(ef3._precompute_frontier()[0], params[0])
+
+    # Entries are keyed by a digest rather than the matrix itself, and old entries are
+    # dropped once the cache is full
+    for i in range(efficient_frontier._CACHE_SIZE + 5):
+        ef2.cov_matrix = ef.cov_matrix * (i + 1)
+        ef2._cholesky_factor()
+    assert len(efficient_frontier._cholesky_cache) == efficient_frontier._CACHE_SIZE
+    for key in efficient_frontier._cholesky_cache:
+        assert len(key[0]) < ef.cov_matrix.nbytes
+
+
 def test_min_volatility_L2_reg():
     ef = setup_efficient_frontier()
     ef.add_objective(objective_functions.L2_reg, gamma=1)
@@ -214,6 +345,22 @@ def test_min_volatility_cvxpy_vs_scipy():
     assert cvxpy_var <= scipy_var
 
 
+def test_min_volatility_explicit_solver():
+    ef = setup_efficient_frontier()
+    ef.min_volatility()
+    w1 = ef.weights
+
+    ef = EfficientFrontier(*setup_efficient_frontier(data_only=True), solver="OSQP")
+    ef.min_volatility()
+    np.testing.assert_allclose(ef.weights, w1, atol=1e-5)
+
+    ef = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), solver="not_a_solver"
+    )
+    with pytest.raises(exceptions.OptimizationError):
+        ef.min_volatility()
+
+
 def test_min_volatility_sector_constraints():
     sector_mapper = {
         "T": "auto",
@@ -829,6 +976,38 @@ def test_efficient_risk_many_values():
         assert abs(target_risk - volatility) < 1e-5
 
 
+def test_efficient_risk_sweep():
+    ef = setup_efficient_frontier()
+    targets = [0.17, 0.2, 0.25]
+    ef.efficient_risk(targets[0])
+    problem = ef._opt
+    for target in targets[1:]:
+        ef.efficient_risk(target)
+        assert ef._opt is problem
+        ef_fresh = setup_efficient_frontier()
+        ef_fresh.efficient_risk(target)
+        np.testing.assert_allclose(ef.weights, ef_fresh.weights, atol=1e-5)
+        np.testing.assert_almost_equal(ef.portfolio_performance()[1], target, decimal=5)
+
+    # Adding a constraint means the problem must be rebuilt
+    ef.add_constraint(lambda x: x <= 0.2)
+    ef.efficient_risk(0.25)
+    assert ef._opt is not problem
+    assert ef.weights.max() <= 0.2 + 1e-6
+
+    # A sweep can start below the minimum volatility
+    ef = setup_efficient_frontier()
+    with pytest.raises(exceptions.OptimizationError):
+        ef.efficient_risk(0.1)
+    problem = ef._opt
+    ef.efficient_risk(0.2)
+    assert ef._opt is problem
+    assert len(ef._constraints) == 4
+    ef_fresh = setup_efficient_frontier()
+    ef_fresh.efficient_risk(0.2)
+    np.testing.assert_allclose(ef.weights, ef_fresh.weights, atol=1e-5)
+
+
 def test_efficient_risk_short():
     ef = EfficientFrontier(
         *setup_efficient_frontier(data_only=True), weight_bounds=(-1, 1)
@@ -966,6 +1145,154 @@ def test_efficient_return_many_values():
         assert abs(target_return - mean_return) < 0.05
 
 
+def test_efficient_return_sweep():
+    ef = setup_efficient_frontier()
+    targets = [0.2, 0.25, 0.3]
+    ef.efficient_return(targets[0])
+    problem = ef._opt
+    for target in targets[1:]:
+        ef.efficient_return(target)
+        assert ef._opt is problem
+        ef_fresh = setup_efficient_frontier()
+        ef_fresh.efficient_return(target)
+        np.testing.assert_allclose(ef.weights, ef_fresh.weights, atol=1e-5)
+        np.testing.assert_almost_equal(ef.portfolio_performance()[0], target, decimal=5)
+        assert all(i >= 0 for i in ef.weights)
+
+    # A different method builds a new problem
+    ef.min_volatility()
+    ef.efficient_return(0.25)
+    assert ef._opt is not problem
+
+
+def test_sample_frontier():
+    targets = np.array([0.15, 0.2, 0.25, 0.3])
+
+    # Shorting allowed: no bounds are hit, so all points are analytic
+    ef = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    sample = ef.sample_frontier(targets)
+    assert ef.weights is None
+    assert sample.weights.shape == (len(targets), ef.n_assets)
+    assert sample.weights.flags["C_CONTIGUOUS"]
+    assert sample.returns.shape == sample.volatilities.shape == (len(targets),)
+    np.testing.assert_allclose(sample.weights.sum(axis=1), 1)
+    for target, w, vol in zip(targets, sample.weights, sample.volatilities):
+        ef_single = EfficientFrontier(
+            *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+        )
+        ef_single.efficient_return(target)
+        np.testing.assert_allclose(w, ef_single.weights)
+        np.testing.assert_almost_equal(vol, ef_single.portfolio_performance()[1])
+
+    # Long-only bounds are hit, so the solver is used
+    ef = setup_efficient_frontier()
+    sample = ef.sample_frontier(targets[1:])
+    np.testing.assert_allclose(sample.returns, targets[1:], atol=1e-5)
+    assert (sample.weights >= 0).all()
+    assert ef.weights is None
+
+    # The instance is unaffected by the solver calls
+    ef.min_volatility()
+    ef_fresh = setup_efficient_frontier()
+    ef_fresh.min_volatility()
+    np.testing.assert_allclose(
+        ef.portfolio_performance(), ef_fresh.portfolio_performance(), atol=1e-6
+    )
+
+    # Constraints left behind by earlier optimisations are ignored
+    ef_fresh = setup_efficient_frontier()
+    expected = ef_fresh.sample_frontier([0.2, 0.3, 0.4])
+    ef = setup_efficient_frontier()
+    ef.efficient_risk(0.2)
+    sample = ef.sample_frontier([0.2, 0.3, 0.4])
+    np.testing.assert_allclose(sample.weights, expected.weights, atol=1e-6)
+    assert len(ef._constraints) == 4
+
+    ef = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    ef.efficient_risk(0.2)
+    sample = ef.sample_frontier(targets)
+    ef_fresh = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    expected = ef_fresh.sample_frontier(targets)
+    np.testing.assert_allclose(sample.weights, expected.weights)
+
+    with pytest.raises(ValueError):
+        ef.sample_frontier([0.2, ef.expected_returns.max() + 0.01])
+
+
+def test_update_returns():
+    returns = get_data().dropna().pct_change().dropna()
+    window = 100
+    start = returns.iloc[:window]
+    ef = EfficientFrontier(
+        start.mean() * 252,
+        risk_models.sample_cov(start, returns_data=True),
+        weight_bounds=(None, None),
+    )
+    mean = start.mean().values
+    for i in range(3):
+        mean = ef.update_returns(
+            returns.iloc[window + i], returns.iloc[i], mean, window
+        )
+        shifted = returns.iloc[i + 1 : window + i + 1]
+        np.testing.assert_allclose(mean, shifted.mean().values)
+        np.testing.assert_allclose(
+            ef.cov_matrix, risk_models.sample_cov(shifted, returns_data=True).values
+        )
+
+    # Expected returns are rolled forward too
+    np.testing.assert_allclose(ef.expected_returns, shifted.mean().values * 252)
+
+    # Analytic solutions use the maintained inverse, and match a fresh optimiser
+    assert ef._maintained_cov_inverse() is not None
+    ef_fresh = EfficientFrontier(
+        shifted.mean() * 252, shifted.cov() * 252, weight_bounds=(None, None)
+    )
+    ef.min_volatility()
+    ef_fresh.min_volatility()
+    np.testing.assert_allclose(ef.weights, ef_fresh.weights, atol=1e-8)
+    ef.efficient_return(0.2)
+    ef_fresh.efficient_return(0.2)
+    np.testing.assert_allclose(ef.weights, ef_fresh.weights, atol=1e-8)
+
+    # Expected returns from another model are left for the caller to update
+    mu = ef.expected_returns
+    ef.update_returns(
+        returns.iloc[window + 3],
+        returns.iloc[3],
+        mean,
+        window,
+        set_expected_returns=False,
+    )
+    assert ef.expected_returns is mu
+
+    with pytest.raises(ValueError):
+        ef.update_returns(returns.iloc[0], returns.iloc[1], mean, 2)
+
+    # Target constraints from solver-based calls are discarded, user constraints kept
+    ef = EfficientFrontier(
+        start.mean() * 252, risk_models.sample_cov(start, returns_data=True)
+    )
+    ef.add_constraint(lambda w: w[0] <= 0.1)
+    ef.efficient_risk(0.25)
+    ef.update_returns(
+        returns.iloc[window], returns.iloc[0], start.mean().values, window
+    )
+    assert len(ef._constraints) == 3
+    ef.efficient_risk(0.35)
+    shifted = returns.iloc[1 : window + 1]
+    ef_fresh = EfficientFrontier(shifted.mean() * 252, shifted.cov() * 252)
+    ef_fresh.add_constraint(lambda w: w[0] <= 0.1)
+    ef_fresh.efficient_risk(0.35)
+    np.testing.assert_allclose(ef.weights, ef_fresh.weights, atol=1e-6)
+    np.testing.assert_almost_equal(ef.portfolio_performance()[1], 0.35)
+
+
 def test_efficient_return_short():
     ef = EfficientFrontier(
         *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
@@ -986,6 +1313,29 @@ def test_efficient_return_short():
     assert sharpe > long_only_sharpe
 
 
+def test_efficient_return_closed_form():
+    ef = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    w_analytic = ef._efficient_return_closed_form(0.25)
+    assert w_analytic is not None
+    np.testing.assert_almost_equal(w_analytic.sum(), 1)
+    np.testing.assert_almost_equal(w_analytic @ ef.expected_returns, 0.25)
+
+    # An extra constraint forces the solver path
+    ef_solver = EfficientFrontier(
+        *setup_efficient_frontier(data_only=True), weight_bounds=(None, None)
+    )
+    ef_solver.add_constraint(lambda x: x <= 1)
+    ef_solver.efficient_return(0.25)
+    np.testing.assert_allclose(w_analytic, ef_solver.weights, atol=1e-4)
+
+    # Targets below the minimum variance return give the minimum variance portfolio
+    np.testing.assert_allclose(
+        ef._efficient_return_closed_form(0.01), ef._min_volatility_closed_form()
+    )
+
+
 def test_efficient_return_L2_reg():
     ef = setup_efficient_frontier()
     ef.add_objective(objective_functions.L2_reg, gamma=1)
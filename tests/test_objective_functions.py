@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+import cvxpy as cp
 from pypfopt.expected_returns import mean_historical_return
 from pypfopt import objective_functions
 from pypfopt.risk_models import sample_cov
@@ -90,3 +91,25 @@ def test_transaction_costs():
     k = 0.1
     tx_cost = k * np.abs(old_w - new_w).sum()
     assert tx_cost == objective_functions.transaction_cost(new_w, old_w, k=k)
+
+
+def test_numpy_weights_match_cvxpy_expressions():
+    df = get_data()
+    e_rets = mean_historical_return(df).values
+    S = sample_cov(df).values
+    w = np.random.RandomState(0).dirichlet(np.ones(len(e_rets)))
+    w_var = cp.Variable(len(e_rets))
+    w_var.value = w
+
+    np.testing.assert_almost_equal(
+        objective_functions.portfolio_variance(w, S),
+        objective_functions.portfolio_variance(w_var, S).value,
+    )
+    np.testing.assert_almost_equal(
+        objective_functions.sharpe_ratio(w, e_rets, S),
+        objective_functions.sharpe_ratio(w_var, e_rets, S).value,
+    )
+    np.testing.assert_almost_equal(
+        objective_functions.quadratic_utility(w, e_rets, S, risk_aversion=2),
+        objective_functions.quadratic_utility(w_var, e_rets, S, risk_aversion=2).value,
+    )